@@ -2,16 +2,18 @@ import json, os, sys, threading, time
 from pathlib import Path
 import requests
 import minecraft_launcher_lib
-from PySide6.QtCore import Qt, QRegularExpression, QTimer
-from PySide6.QtGui import QFont, QRegularExpressionValidator, QPalette, QColor, QIcon
+from PySide6.QtCore import Qt, QRegularExpression, QTimer, Signal
+from PySide6.QtGui import QFont, QRegularExpressionValidator, QPalette, QColor, QIcon, QTextCursor
 from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QFormLayout, QLineEdit,
-    QPushButton, QGroupBox, QLabel, QMessageBox, QComboBox, QProgressBar
+    QPushButton, QGroupBox, QLabel, QMessageBox, QComboBox, QProgressBar,
+    QHBoxLayout, QListWidget, QListWidgetItem, QPlainTextEdit
 )
 
 sys.path.insert(0, str(Path(__file__).parent))
 from launcher import MinecraftLauncher
 from qlassets import QuarzismAssets
+from instances import InstanceManager
 
 CONFIG_FILE = Path(__file__).with_name("settings.json")
 
@@ -21,24 +23,33 @@ def load_settings():
             data = json.load(f)
     except (FileNotFoundError, json.JSONDecodeError):
         data = {}
-    return {"username": data.get("username", "Player"), "ram": int(data.get("ram", 4096))}
+    # Older versions stored "ram" for every launch; only an explicit override is kept now
+    return {"username": data.get("username", "Player"), "ram": int(data.get("ram_override", 0))}
 
 def save_settings(username, ram):
-    CONFIG_FILE.write_text(json.dumps({"username": username, "ram": ram}, indent=2))
+    CONFIG_FILE.write_text(json.dumps({"username": username, "ram_override": ram}, indent=2))
 
 class QuarzismClientGUI(QWidget):
+    kill_finished = Signal()
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Quarzism Client")
         self.setWindowIcon(QIcon(str(Path(__file__).parent / "icon.png")))
-        self.resize(800, 600)
+        self.resize(800, 900)
         self.settings = load_settings()
         self.launcher = MinecraftLauncher(Path(__file__).parent / ".." / "game" / ".minecraft")
-        self.assets = QuarzismAssets(self.launcher.minecraft_dir)
-        self.process = None
+        self.instances = InstanceManager(self.launcher)
+        self.attached = None
+        self.attached_offset = 0
         self.available_versions = []
         self._build_ui()
         self._load_versions()
+        self._refresh_instances()
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self._refresh_instances)
+        self.refresh_timer.start(1000)
+        self.kill_finished.connect(self._kill_finished)
         threading.Thread(target=self._import_settings, daemon=True).start()
 
     def _build_ui(self):
@@ -67,8 +78,11 @@ class QuarzismClientGUI(QWidget):
         self.username_edit.setFont(QFont("Segoe UI", 11))
         form.addRow("Username:", self.username_edit)
 
-        self.ram_edit = QLineEdit(str(self.settings["ram"]))
+        self.ram_edit = QLineEdit(str(self.settings["ram"] or ""))
         self.ram_edit.setFont(QFont("Segoe UI", 11))
+        self.ram_edit.setPlaceholderText("Auto")
+        self.ram_edit.setToolTip("Leave empty to split free RAM between instances.\n"
+                                 "A typed value overrides the automatic split for every launch.")
         self.ram_edit.setValidator(QRegularExpressionValidator(QRegularExpression(r"\d+")))
         form.addRow("RAM (MB):", self.ram_edit)
         vbox.addWidget(group)
@@ -103,6 +117,30 @@ class QuarzismClientGUI(QWidget):
         vbox.addWidget(self.btn)
         self.btn.clicked.connect(self._launch_button)
 
+        instances_group = QGroupBox("Instances")
+        instances_group.setFont(QFont("Segoe UI", 12))
+        instances_box = QVBoxLayout(instances_group)
+
+        self.instance_list = QListWidget()
+        self.instance_list.setFont(QFont("Segoe UI", 11))
+        instances_box.addWidget(self.instance_list)
+
+        buttons = QHBoxLayout()
+        self.attach_btn = QPushButton("Attach")
+        self.attach_btn.clicked.connect(self._attach)
+        buttons.addWidget(self.attach_btn)
+        self.kill_btn = QPushButton("Kill")
+        self.kill_btn.clicked.connect(self._kill)
+        buttons.addWidget(self.kill_btn)
+        instances_box.addLayout(buttons)
+
+        self.log_view = QPlainTextEdit()
+        self.log_view.setReadOnly(True)
+        self.log_view.setFont(QFont("Monospace", 9))
+        self.log_view.setMaximumBlockCount(2000)
+        instances_box.addWidget(self.log_view)
+        vbox.addWidget(instances_group)
+
     def _load_versions(self):
         try:
             self.available_versions = self.launcher.get_available_versions()
@@ -131,22 +169,18 @@ class QuarzismClientGUI(QWidget):
         except Exception as e:
             print(f"Failed to import Minecraft settings: {e}")
 
-    def _import_assets(self):
+    def _import_assets(self, game_dir):
         time.sleep(10)
-        success = self.assets.import_all_assets()
+        success = QuarzismAssets(game_dir).import_all_assets()
         if success:
             print("Quarzism assets imported successfully")
         else:
             print("Failed to import some Quarzism assets")
 
     def _launch_button(self):
-        if self.btn.text() == "KILL":
-            self._kill()
-            return
-
         version = self.version_combo.currentText()
         username = self.username_edit.text().strip() or "Player"
-        ram = max(512, int(self.ram_edit.text()))
+        ram = max(512, int(self.ram_edit.text())) if self.ram_edit.text() else 0
         save_settings(username, ram)
 
         if not self.launcher.is_version_installed(version):
@@ -172,34 +206,80 @@ class QuarzismClientGUI(QWidget):
 
         self.btn.setText("Starting…")
         self.btn.setEnabled(False)
-        cmd = self.launcher.get_launch_command(version, username, ram, [])
-        import subprocess
-        self.process = subprocess.Popen(cmd)
-        threading.Thread(target=self._import_assets, daemon=True).start()
-        threading.Thread(target=self._monitor, daemon=True).start()
-
-    def _monitor(self):
-        if not self.process:
+        messages = []
+        instance = self.instances.launch(version, username, ram or None, callback=messages.append)
+        if instance is None:
+            reason = messages[-1] if messages else "Unknown error"
+            QMessageBox.critical(self, "Launch failed", f"Could not start a new game instance.\n\n{reason}")
+            self._reset()
             return
-        time.sleep(3)
-        self.btn.setText("KILL")
-        self.btn.setEnabled(True)
-        while True:
-            if self.process.poll() is not None:
-                QTimer.singleShot(0, self._reset)
-                break
-            time.sleep(0.25)
+        warnings = [message for message in messages if message.startswith("No free CPUs")]
+        if warnings:
+            QMessageBox.warning(self, "Shared CPUs", warnings[0])
+        threading.Thread(target=self._import_assets, args=(instance.game_dir,), daemon=True).start()
+        self._refresh_instances()
+        self._reset()
+
+    def _selected_instance(self):
+        item = self.instance_list.currentItem()
+        if item is None:
+            return None
+        return item.data(Qt.UserRole)
+
+    def _refresh_instances(self):
+        selected = self._selected_instance()
+        self.instance_list.clear()
+        running = self.instances.list_instances()
+        plan = self.instances.plan(1, running)[0]
+        if plan["ram_mb"]:
+            self.ram_edit.setPlaceholderText(f"Auto ({plan['ram_mb']} MB)")
+        else:
+            self.ram_edit.setPlaceholderText("Auto (no free RAM)")
+        for instance in running:
+            cpus = ",".join(str(cpu) for cpu in instance.cpus)
+            item = QListWidgetItem(f"{instance.name}  |  {instance.version}  |  "
+                                   f"{instance.ram_mb}MB  |  CPUs {cpus}  |  pid {instance.pid}")
+            item.setData(Qt.UserRole, instance.name)
+            self.instance_list.addItem(item)
+            if instance.name == selected:
+                self.instance_list.setCurrentItem(item)
+        if self.attached is not None:
+            running = self.attached.is_running()
+            text, self.attached_offset = self.instances.read_log(self.attached, self.attached_offset)
+            if text:
+                self.log_view.moveCursor(QTextCursor.End)
+                self.log_view.insertPlainText(text)
+            if not running:
+                self.log_view.appendPlainText(f"[{self.attached.name} exited]")
+                self.attached = None
+
+    def _attach(self):
+        name = self._selected_instance()
+        if name is None:
+            return
+        self.attached = self.instances.get(name)
+        self.attached_offset = 0
+        self.log_view.clear()
+        self._refresh_instances()
 
     def _kill(self):
-        if self.process and self.process.poll() is None:
-            self.process.terminate()
-            self.process.wait()
-        self._reset()
+        name = self._selected_instance()
+        if name is None:
+            return
+        self.kill_btn.setEnabled(False)
+        threading.Thread(target=self._kill_worker, args=(name,), daemon=True).start()
+
+    def _kill_worker(self, name):
+        self.instances.kill(name)
+        self.kill_finished.emit()
+
+    def _kill_finished(self):
+        self.kill_btn.setEnabled(True)
+        self._refresh_instances()
 
     def _reset(self):
         self.btn.setText("LAUNCH")
         self.btn.setEnabled(True)
-        self.process = None
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
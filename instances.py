@@ -0,0 +1,376 @@
+import subprocess
+import os
+import re
+import shutil
+import signal
+import time
+import json
+import logging
+import threading
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+HOST_RESERVE_MB = 2048
+MIN_RAM_MB = 512
+MAX_RAM_MB = 8192
+MAX_CPUS = 4
+RESERVED_NAMES = {"all", "instances"}
+
+def get_total_memory_mb() -> int:
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return 8192
+
+def get_available_cpus() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def get_process_identity(pid: int) -> Optional[str]:
+    """Return boot id and start time of `pid`, or None if it is gone or /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            stat = f.read()
+        with open("/proc/sys/kernel/random/boot_id", "r") as f:
+            boot_id = f.read().strip()
+    except OSError:
+        return None
+    fields = stat.rsplit(")", 1)[1].split()
+    if fields[0] in ("Z", "X"):
+        return None
+    return f"{boot_id}:{fields[19]}"
+
+def plan_resources(count: int, held_ram_mb: int = 0,
+                   held_cpus: List[int] = None) -> List[Dict[str, Any]]:
+    """Split the RAM and CPUs not held by running instances into `count` budgets.
+
+    `ram_mb` is 0 when there is not enough free RAM left, `free_ram_mb` is the
+    total RAM still free, and `shared` is set when there are too few free CPUs
+    and instances have to share them.
+    """
+    count = max(1, count)
+    held_cpus = held_cpus or []
+    free_ram = get_total_memory_mb() - HOST_RESERVE_MB - held_ram_mb
+    ram_mb = free_ram // count
+    ram_mb -= ram_mb % 256
+    ram_mb = min(MAX_RAM_MB, ram_mb) if ram_mb >= MIN_RAM_MB else 0
+    cpus = get_available_cpus()
+    free_cpus = [cpu for cpu in cpus if cpu not in held_cpus]
+    plans = []
+    if count > len(free_cpus):
+        load = {cpu: held_cpus.count(cpu) for cpu in cpus}
+        for i in range(count):
+            cpu = min(cpus, key=lambda c: (load[c], c))
+            load[cpu] += 1
+            plans.append({"ram_mb": ram_mb, "free_ram_mb": free_ram, "cpus": [cpu], "shared": True})
+        return plans
+    chunk, extra = divmod(len(free_cpus), count)
+    start = 0
+    for i in range(count):
+        size = min(MAX_CPUS, chunk + (1 if i < extra else 0))
+        plans.append({"ram_mb": ram_mb, "free_ram_mb": free_ram,
+                      "cpus": free_cpus[start:start + size], "shared": False})
+        start += size
+    return plans
+
+class GameInstance:
+    def __init__(self, name: str, version: str, username: str, game_dir: str,
+                 ram_mb: int, cpus: List[int], pid: int, log_file: str,
+                 started: float = None, identity: str = None,
+                 process: subprocess.Popen = None):
+        self.name = name
+        self.version = version
+        self.username = username
+        self.game_dir = game_dir
+        self.ram_mb = ram_mb
+        self.cpus = cpus
+        self.pid = pid
+        self.log_file = log_file
+        self.started = started if started is not None else time.time()
+        self.identity = identity
+        self.process = process
+        self.exit_code = None
+
+    def is_running(self) -> bool:
+        if self.exit_code is not None:
+            return False
+        if self.process is not None:
+            self.exit_code = self.process.poll()
+            return self.exit_code is None
+        if self.identity is not None:
+            return get_process_identity(self.pid) == self.identity
+        if os.path.isdir("/proc"):
+            # The PID alone may belong to an unrelated process by now
+            return False
+        try:
+            os.kill(self.pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _wait_exit(self, timeout: float):
+        deadline = time.time() + timeout
+        while self.is_running() and time.time() < deadline:
+            time.sleep(0.25)
+
+    def terminate(self, timeout: float = 10.0):
+        if not self.is_running():
+            return
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.exit_code = self.process.returncode
+            return
+        try:
+            os.kill(self.pid, signal.SIGTERM)
+            self._wait_exit(timeout)
+            if self.is_running():
+                os.kill(self.pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+                self._wait_exit(2.0)
+        except ProcessLookupError:
+            pass
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "version": self.version,
+            "username": self.username,
+            "game_dir": self.game_dir,
+            "ram_mb": self.ram_mb,
+            "cpus": self.cpus,
+            "pid": self.pid,
+            "log_file": self.log_file,
+            "started": self.started,
+            "identity": self.identity
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GameInstance":
+        return cls(**data)
+
+class InstanceManager:
+    def __init__(self, launcher, instances_dir: str = None):
+        if instances_dir is None:
+            instances_dir = os.path.join(launcher.minecraft_dir, "..", "instances")
+        self.launcher = launcher
+        self.instances_dir = os.path.abspath(instances_dir)
+        os.makedirs(self.instances_dir, exist_ok=True)
+        self.registry_file = os.path.join(self.instances_dir, "instances.json")
+        self.instances: Dict[str, GameInstance] = {}
+        self.lock = threading.RLock()
+        self.logger = logging.getLogger(__name__)
+
+    def _load(self) -> Optional[set]:
+        try:
+            with open(self.registry_file, "r") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            entries = []
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"Could not read {self.registry_file}: {e}")
+            return None
+        names = set()
+        for entry in entries:
+            try:
+                instance = GameInstance.from_dict(entry)
+            except TypeError:
+                continue
+            names.add(instance.name)
+            self.instances.setdefault(instance.name, instance)
+        return names
+
+    def _save(self):
+        entries = [instance.to_dict() for instance in self.instances.values()]
+        temp_file = f"{self.registry_file}.{os.getpid()}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump(entries, f, indent=2)
+        os.replace(temp_file, self.registry_file)
+
+    def list_instances(self) -> List[GameInstance]:
+        with self.lock:
+            names = self._load()
+            for name, instance in list(self.instances.items()):
+                if not instance.is_running():
+                    self.logger.info(f"Instance {name} exited with code {instance.exit_code}")
+                    del self.instances[name]
+            if names is not None and names != set(self.instances):
+                self._save()
+            return sorted(self.instances.values(), key=lambda instance: instance.started)
+
+    def plan(self, count: int = 1, running: List[GameInstance] = None) -> List[Dict[str, Any]]:
+        if running is None:
+            running = self.list_instances()
+        held_ram = sum(instance.ram_mb for instance in running)
+        held_cpus = [cpu for instance in running for cpu in instance.cpus]
+        return plan_resources(count, held_ram, held_cpus)
+
+    def get(self, name: str) -> Optional[GameInstance]:
+        for instance in self.list_instances():
+            if instance.name == name:
+                return instance
+        return None
+
+    def _unique_name(self, username: str) -> Optional[str]:
+        base = re.sub(r"[^A-Za-z0-9_]", "_", username) or "Player"
+        if base.lower() in RESERVED_NAMES:
+            return None
+        name = base
+        index = 2
+        while name in self.instances:
+            name = f"{base}-{index}"
+            index += 1
+        return name
+
+    def _prepare_game_dir(self, game_dir: str):
+        os.makedirs(game_dir, exist_ok=True)
+        if os.path.abspath(game_dir) == self.launcher.minecraft_dir:
+            return
+        for item in ["options.txt", "servers.dat", "resourcepacks"]:
+            source = os.path.join(self.launcher.minecraft_dir, item)
+            target = os.path.join(game_dir, item)
+            if not os.path.exists(source) or os.path.exists(target):
+                continue
+            if os.path.isdir(source):
+                shutil.copytree(source, target)
+            else:
+                shutil.copy2(source, target)
+
+    def _spawn(self, version: str, username: str, ram_mb: int, cpus: List[int],
+               game_dir: str = None, custom_args: List[str] = None,
+               callback: Optional[Callable] = None) -> Optional[GameInstance]:
+        name = self._unique_name(username)
+        if name is None:
+            error_msg = f"Username {username} is reserved and cannot be used for an instance"
+            if callback:
+                callback(error_msg)
+            self.logger.error(error_msg)
+            return None
+        if game_dir is None:
+            game_dir = os.path.join(self.instances_dir, name)
+        game_dir = os.path.abspath(game_dir)
+        log_file = os.path.join(self.instances_dir, f"{name}.log")
+        try:
+            self._prepare_game_dir(game_dir)
+            command = self.launcher.get_launch_command(version, username, ram_mb, custom_args, game_dir=game_dir)
+            if callback:
+                callback(f"Launching instance {name} ({version}) with {ram_mb}MB RAM on CPUs {cpus}...")
+            self.logger.info(f"Launching instance {name} with command: {' '.join(command)}")
+            preexec_fn = None
+            if cpus and hasattr(os, "sched_setaffinity"):
+                preexec_fn = lambda: os.sched_setaffinity(0, cpus)
+            with open(log_file, "wb") as log:
+                process = subprocess.Popen(command, cwd=game_dir, stdout=log,
+                                           stderr=subprocess.STDOUT, start_new_session=True,
+                                           preexec_fn=preexec_fn)
+        except Exception as e:
+            error_msg = f"Error launching instance {name}: {str(e)}"
+            if callback:
+                callback(error_msg)
+            self.logger.error(error_msg)
+            return None
+        instance = GameInstance(name, version, username, game_dir, ram_mb, cpus, process.pid,
+                                log_file, identity=get_process_identity(process.pid),
+                                process=process)
+        with self.lock:
+            self.instances[name] = instance
+        self.list_instances()
+        return instance
+
+    def _ensure_installed(self, version: str, callback: Optional[Callable] = None) -> bool:
+        if self.launcher.is_version_installed(version):
+            return True
+        if callback:
+            callback(f"Version {version} is not installed. Installing now...")
+        return self.launcher.install_version(version, callback)
+
+    def _check_plan(self, plan: Dict[str, Any], ram_mb: Optional[int], count: int = 1,
+                    callback: Optional[Callable] = None) -> Optional[int]:
+        error_msg = None
+        if ram_mb is None and not plan["ram_mb"]:
+            error_msg = "Not enough free RAM for another instance"
+        elif ram_mb is not None and ram_mb * count > plan["free_ram_mb"]:
+            error_msg = (f"Requested {ram_mb * count}MB RAM is more than the "
+                         f"{max(0, plan['free_ram_mb'])}MB still free")
+        if error_msg:
+            if callback:
+                callback(error_msg)
+            self.logger.error(error_msg)
+            return None
+        if plan["shared"]:
+            warning = f"No free CPUs left, sharing CPUs {plan['cpus']} with running instances"
+            if callback:
+                callback(warning)
+            self.logger.warning(warning)
+        return ram_mb or plan["ram_mb"]
+
+    def launch(self, version: str, username: str = "Player", ram_mb: int = None,
+               game_dir: str = None, custom_args: List[str] = None,
+               callback: Optional[Callable] = None) -> Optional[GameInstance]:
+        if not self._ensure_installed(version, callback):
+            return None
+        plan = self.plan(1)[0]
+        budget = self._check_plan(plan, ram_mb, callback=callback)
+        if budget is None:
+            return None
+        return self._spawn(version, username, budget, plan["cpus"],
+                           game_dir, custom_args, callback)
+
+    def launch_many(self, version: str, usernames: List[str], ram_mb: int = None,
+                    custom_args: List[str] = None,
+                    callback: Optional[Callable] = None) -> List[GameInstance]:
+        if not self._ensure_installed(version, callback):
+            return []
+        plans = self.plan(len(usernames))
+        budget = self._check_plan(plans[0], ram_mb, len(usernames), callback)
+        if budget is None:
+            return []
+        launched = []
+        for username, plan in zip(usernames, plans):
+            instance = self._spawn(version, username, budget, plan["cpus"],
+                                   custom_args=custom_args, callback=callback)
+            if instance:
+                launched.append(instance)
+        return launched
+
+    def kill(self, name: str, timeout: float = 10.0) -> bool:
+        instance = self.get(name)
+        if instance is None:
+            return False
+        instance.terminate(timeout)
+        self.logger.info(f"Killed instance {name}")
+        self.list_instances()
+        return True
+
+    def kill_all(self, timeout: float = 10.0):
+        for instance in self.list_instances():
+            self.kill(instance.name, timeout)
+
+    def read_log(self, instance: GameInstance, offset: int = 0) -> Tuple[str, int]:
+        try:
+            with open(instance.log_file, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return "", offset
+        return data.decode("utf-8", errors="replace"), offset + len(data)
+
+    def attach(self, name: str, callback: Callable, poll_interval: float = 0.5) -> Optional[int]:
+        instance = self.get(name)
+        if instance is None:
+            return None
+        offset = 0
+        while True:
+            running = instance.is_running()
+            text, offset = self.read_log(instance, offset)
+            if text:
+                callback(text)
+            if not running:
+                break
+            time.sleep(poll_interval)
+        return instance.exit_code
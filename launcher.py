@@ -7,6 +7,7 @@ import json
 import requests
 from typing import List, Dict, Any, Callable, Optional
 from pathlib import Path
+from instances import InstanceManager
 
 log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "logs")
 os.makedirs(log_dir, exist_ok=True)
@@ -70,7 +71,7 @@ class MinecraftLauncher:
             return False
     
     def get_launch_command(self, version: str, username: str, ram_mb: int = 4096, 
-                          custom_args: List[str] = None) -> List[str]:
+                          custom_args: List[str] = None, game_dir: str = None) -> List[str]:
         jvm_args = [
             f"-Xms{ram_mb//2}M",
             f"-Xmx{ram_mb}M",
@@ -88,6 +89,8 @@ class MinecraftLauncher:
             "uuid": "",
             "token": ""
         }
+        if game_dir:
+            options["gameDirectory"] = game_dir
         command = minecraft_launcher_lib.command.get_minecraft_command(
             version=version,
             minecraft_directory=self.minecraft_dir,
@@ -136,6 +139,24 @@ if __name__ == "__main__":
     launch_parser.add_argument("--ram", "-r", help="RAM in MB", type=int, default=4096)
     launch_parser.add_argument("--dir", help="Minecraft directory", default=None)
     launch_parser.add_argument("--jvm-args", help="Additional JVM arguments", nargs="+")
+    spawn_parser = subparsers.add_parser("spawn", help="Launch one background instance per username")
+    spawn_parser.add_argument("version", help="Minecraft version to launch")
+    spawn_parser.add_argument("--username", "-u", help="Player username (repeat for more instances)",
+                              action="append", default=None)
+    spawn_parser.add_argument("--ram", "-r", help="RAM in MB per instance (default: split host RAM)",
+                              type=int, default=None)
+    spawn_parser.add_argument("--game-dir", help="Game directory (single instance only)", default=None)
+    spawn_parser.add_argument("--dir", help="Minecraft directory", default=None)
+    spawn_parser.add_argument("--jvm-args", help="Additional JVM arguments", nargs="+")
+    instances_parser = subparsers.add_parser("instances", help="List running instances")
+    instances_parser.add_argument("--dir", help="Minecraft directory", default=None)
+    attach_parser = subparsers.add_parser("attach", help="Follow the output of a running instance")
+    attach_parser.add_argument("name", help="Instance name")
+    attach_parser.add_argument("--dir", help="Minecraft directory", default=None)
+    kill_parser = subparsers.add_parser("kill", help="Kill a running instance")
+    kill_parser.add_argument("name", help="Instance name", nargs="?")
+    kill_parser.add_argument("--all", help="Kill every running instance", action="store_true")
+    kill_parser.add_argument("--dir", help="Minecraft directory", default=None)
     args = parser.parse_args()
     launcher = MinecraftLauncher(args.dir)
     def print_status(status):
@@ -158,6 +179,50 @@ if __name__ == "__main__":
             callback=print_status
         )
         sys.exit(exit_code)
+    elif args.command == "spawn":
+        usernames = args.username or ["Player"]
+        if args.game_dir and len(usernames) > 1:
+            parser.error("--game-dir can only be used with a single --username")
+        manager = InstanceManager(launcher)
+        if len(usernames) == 1:
+            instance = manager.launch(args.version, usernames[0], args.ram, args.game_dir,
+                                      args.jvm_args, print_status)
+            launched = [instance] if instance else []
+        else:
+            launched = manager.launch_many(args.version, usernames, args.ram,
+                                           args.jvm_args, print_status)
+        for instance in launched:
+            print(f"Started {instance.name} (pid {instance.pid})")
+        sys.exit(0 if len(launched) == len(usernames) else 1)
+    elif args.command == "instances":
+        manager = InstanceManager(launcher)
+        instances = manager.list_instances()
+        if not instances:
+            print("No running instances")
+        for instance in instances:
+            cpus = ",".join(str(cpu) for cpu in instance.cpus)
+            print(f"  {instance.name}  pid={instance.pid}  version={instance.version}  "
+                  f"user={instance.username}  ram={instance.ram_mb}MB  cpus={cpus}  dir={instance.game_dir}")
+    elif args.command == "attach":
+        manager = InstanceManager(launcher)
+        if manager.get(args.name) is None:
+            print(f"No running instance named {args.name}")
+            sys.exit(1)
+        try:
+            exit_code = manager.attach(args.name, lambda text: print(text, end="", flush=True))
+        except KeyboardInterrupt:
+            print(f"\nDetached from {args.name}")
+            sys.exit(0)
+        sys.exit(exit_code or 0)
+    elif args.command == "kill":
+        if bool(args.name) == args.all:
+            parser.error("kill needs either an instance name or --all")
+        manager = InstanceManager(launcher)
+        if args.all:
+            manager.kill_all()
+        elif not manager.kill(args.name):
+            print(f"No running instance named {args.name}")
+            sys.exit(1)
     else:
         parser.print_help()
         sys.exit(1)
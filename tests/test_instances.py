@@ -0,0 +1,123 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import instances
+from instances import GameInstance, InstanceManager, plan_resources
+
+class FakeLauncher:
+    def __init__(self, minecraft_dir):
+        self.minecraft_dir = str(minecraft_dir)
+        os.makedirs(self.minecraft_dir, exist_ok=True)
+
+    def is_version_installed(self, version):
+        return True
+
+    def get_launch_command(self, version, username, ram_mb, custom_args, game_dir=None):
+        return [sys.executable, "-c", "import time; time.sleep(30)"]
+
+@pytest.fixture
+def host(monkeypatch):
+    monkeypatch.setattr(instances, "get_total_memory_mb", lambda: 16384)
+    monkeypatch.setattr(instances, "get_available_cpus", lambda: list(range(8)))
+    monkeypatch.setattr(os, "sched_setaffinity", lambda pid, cpus: None, raising=False)
+
+@pytest.fixture
+def manager(tmp_path, host):
+    manager = InstanceManager(FakeLauncher(tmp_path / ".minecraft"), tmp_path / "instances")
+    yield manager
+    manager.kill_all(timeout=5)
+
+def test_plan_resources_subtracts_held(host):
+    plans = plan_resources(2, held_ram_mb=8192, held_cpus=[0, 1, 2, 3])
+    assert [plan["ram_mb"] for plan in plans] == [3072, 3072]
+    assert [plan["cpus"] for plan in plans] == [[4, 5], [6, 7]]
+    assert not any(plan["shared"] for plan in plans)
+
+def test_plan_resources_without_free_ram(host):
+    assert plan_resources(1, held_ram_mb=14336)[0]["ram_mb"] == 0
+
+def test_plan_resources_shares_least_loaded_cpus(host):
+    plans = plan_resources(2, held_cpus=list(range(8)) + [0, 1])
+    assert [plan["cpus"] for plan in plans] == [[2], [3]]
+    assert all(plan["shared"] for plan in plans)
+
+def test_repeated_launch_splits_free_resources(manager):
+    launched = []
+    for i in range(4):
+        instance = manager.launch("1.20.1", f"Player{i}")
+        if instance is None:
+            break
+        launched.append(instance)
+    assert len(launched) == 2
+    assert sum(instance.ram_mb for instance in launched) <= 16384 - instances.HOST_RESERVE_MB
+    assert not set(launched[0].cpus) & set(launched[1].cpus)
+    messages = []
+    assert manager.launch("1.20.1", "Extra", callback=messages.append) is None
+    assert messages == ["Not enough free RAM for another instance"]
+    assert manager.launch("1.20.1", "Extra", ram_mb=1024) is None
+
+def test_ram_override_is_refused_when_it_does_not_fit(manager):
+    assert manager.launch("1.20.1", "Big", ram_mb=15000) is None
+    assert manager.launch_many("1.20.1", ["A", "B"], ram_mb=8192) == []
+    assert manager.launch("1.20.1", "Small", ram_mb=4096) is not None
+
+def test_launch_many_splits_evenly(manager):
+    launched = manager.launch_many("1.20.1", ["A", "B", "C"])
+    assert [instance.ram_mb for instance in launched] == [4608, 4608, 4608]
+    cpus = [cpu for instance in launched for cpu in instance.cpus]
+    assert len(cpus) == len(set(cpus))
+
+def test_unique_names(manager):
+    first = manager.launch("1.20.1", "Bob", ram_mb=1024)
+    second = manager.launch("1.20.1", "Bob", ram_mb=1024)
+    third = manager.launch("1.20.1", "B ob", ram_mb=1024)
+    assert [first.name, second.name, third.name] == ["Bob", "Bob-2", "B_ob"]
+    assert first.game_dir != second.game_dir
+
+def test_names_stay_inside_instances_dir(manager):
+    for username in ["..", ".", "../evil"]:
+        instance = manager.launch("1.20.1", username, ram_mb=512)
+        assert "." not in instance.name
+        assert os.path.dirname(instance.game_dir) == manager.instances_dir
+
+def test_reserved_names_are_rejected(manager):
+    messages = []
+    assert manager.launch("1.20.1", "all", ram_mb=512, callback=messages.append) is None
+    assert manager.launch("1.20.1", "Instances", ram_mb=512) is None
+    assert "reserved" in messages[-1]
+
+def test_registry_round_trip(manager, tmp_path):
+    instance = manager.launch("1.20.1", "Alice")
+    other = InstanceManager(manager.launcher, tmp_path / "instances")
+    loaded = other.get("Alice")
+    assert loaded is not None and loaded.process is None
+    assert loaded.to_dict() == instance.to_dict()
+    assert other.kill("Alice")
+    assert manager.list_instances() == []
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="needs /proc")
+def test_reused_pid_is_not_running(manager, monkeypatch):
+    stale = GameInstance("Stale", "1.20.1", "Stale", "/tmp", 1024, [0], os.getpid(),
+                         "/tmp/stale.log", identity="old-boot:1")
+    unverified = GameInstance("Old", "1.20.1", "Old", "/tmp", 1024, [0], os.getpid(),
+                              "/tmp/old.log")
+    with open(manager.registry_file, "w") as f:
+        json.dump([stale.to_dict(), unverified.to_dict()], f)
+    signals = []
+    monkeypatch.setattr(os, "kill", lambda pid, sig: signals.append((pid, sig)))
+    assert not manager.kill("Stale")
+    manager.kill_all()
+    assert manager.list_instances() == []
+    assert signals == []
+
+def test_corrupt_registry_is_not_overwritten(manager):
+    with open(manager.registry_file, "w") as f:
+        f.write('[{"name": "Cli')
+    manager.list_instances()
+    with open(manager.registry_file, "r") as f:
+        assert f.read() == '[{"name": "Cli'
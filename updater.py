@@ -45,6 +45,7 @@ def get_file_list():
             ("qlassets.py", "https://github.com/Qsenja/Quarzismclient/raw/refs/heads/main/qlassets.py"),
             ("gui.py", "https://github.com/Qsenja/Quarzismclient/raw/refs/heads/main/gui.py"),
             ("launcher.py", "https://github.com/Qsenja/Quarzismclient/raw/refs/heads/main/launcher.py"),
+            ("instances.py", "https://github.com/Qsenja/Quarzismclient/raw/refs/heads/main/instances.py"),
             ("icon.png", "https://github.com/Qsenja/Quarzismclient/raw/refs/heads/main/icon.png"),
             ("version.txt", "https://github.com/Qsenja/Quarzismclient/raw/refs/heads/main/version.txt")
         ]